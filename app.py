@@ -1,8 +1,21 @@
 import streamlit as st
-import pandas as pd
-import pickle
-import numpy as np
 import os
+import xgboost as xgb
+
+try:
+    import treelite_runtime # 可选依赖：Treelite 编译库的运行时，缺失时回退到 Booster
+except ImportError:
+    treelite_runtime = None
+
+try:
+    import onnxruntime as ort # 可选依赖：ONNX Runtime，缺失时回退到 Booster
+except ImportError:
+    ort = None
+
+try:
+    import numexpr as ne # 可选依赖：大批量后处理时融合表达式、多线程求值
+except ImportError:
+    ne = None
 
 # --- 配置页面 ---
 st.set_page_config(
@@ -13,37 +26,179 @@ st.set_page_config(
 )
 
 # --- 全局变量 ---
-MODEL_FILENAME = 'XGBoost_best_model.pkl' 
+MODEL_FILENAME = 'XGBoost_best_model.ubj'  # 由 convert_model.py 从 pkl 转换而来
 MODEL_PATH = MODEL_FILENAME
+TREELITE_LIB = 'wind_model.so'  # 由 compile_treelite.py 编译而来 (可选加速)
+ONNX_PATH = 'wind.onnx'  # 由 convert_onnx.py 导出而来 (可选加速)
+
+# 设为 1 启用 GPU 推理 (仅对批量打分有意义，见 load_model 文档)
+USE_GPU = bool(int(os.environ.get('WIND_GPU', 0)))
 
 # 特征列表
-REQUIRED_FEATURES = ['月', '日', '时', '分', '测风塔70米风速(m/s)', 
-'测风塔50米风速(m/s)', '测风塔30米风速(m/s)', '测风塔10米风速(m/s)'] 
+REQUIRED_FEATURES = ['月', '日', '时', '分', '测风塔70米风速(m/s)',
+'测风塔50米风速(m/s)', '测风塔30米风速(m/s)', '测风塔10米风速(m/s)']
+REQUIRED_FEATURES_SET = frozenset(REQUIRED_FEATURES) # 成员判断用哈希查找，避免每次重跑都线性扫描
+FEATURE_INDEX = {name: i for i, name in enumerate(REQUIRED_FEATURES)} # 特征名→列号，只构建一次
+MODEL_DISPLAY_NAME = MODEL_FILENAME.split('_best_model')[0] # 展示用的模型名，只计算一次
+
+# 控件默认值，启动时写入 st.session_state 一次；
+# 之后控件按 key 复用已有状态，不再每次重跑都重建默认值
+DEFAULTS = {
+    'year': 2023, 'month': 6, 'day': 15, 'hour': 12, 'minute': 0,
+    'speed70': 5.0, 'speed50': 4.5, 'speed30': 4.0, 'speed10': 3.5,
+    'temp': 15.0, 'pressure': 875.0, 'humidity': 60.0,
+    'sweep': False,
+}
+for _k, _v in DEFAULTS.items():
+    st.session_state.setdefault(_k, _v)
+
+# 气象特征控件定义表：(特征名, 控件函数, 控件参数)
+# 渲染时只遍历一次，按需生成 REQUIRED_FEATURES 中出现的条目，
+# 新增特征只需加一行，不必再复制 if 分支
+WIDGET_SPEC = (
+    ('测风塔70米风速(m/s)', st.number_input, dict(min_value=0.0, step=0.1, format='%.1f', key='speed70')),
+    ('测风塔50米风速(m/s)', st.number_input, dict(min_value=0.0, step=0.1, format='%.1f', key='speed50')),
+    ('测风塔30米风速(m/s)', st.number_input, dict(min_value=0.0, step=0.1, format='%.1f', key='speed30')),
+    ('测风塔10米风速(m/s)', st.number_input, dict(min_value=0.0, step=0.1, format='%.1f', key='speed10')),
+    ('温度(°C)', st.number_input, dict(min_value=-20.0, max_value=50.0, step=0.1, format='%.1f', key='temp')),
+    ('气压(hPa)', st.number_input, dict(min_value=800.0, max_value=1100.0, step=0.1, format='%.1f', key='pressure')),
+    ('湿度(%)', st.slider, dict(min_value=0.0, max_value=100.0, step=0.1, format='%.1f', key='humidity')),
+)
 
 
 # --- 加载模型 ---
 @st.cache_resource # 使用缓存加载模型，提高性能
 def load_model(path):
-    """加载pickle格式的模型文件"""
-    try:
-        with open(path, 'rb') as file:
-            model = pickle.load(file)
-        print(f"模型 {path} 加载成功") # 控制台输出加载成功信息
-        return model
-    except FileNotFoundError:
-        st.error(f"错误: 模型文件 {path} 未找到。请确保模型文件在同一目录下，并且文件名正确。") # 在网页上显示错误信息
+    """加载XGBoost原生UBJ格式的模型文件
+
+    直接加载底层 Booster，跳过 pickle 反序列化和 sklearn 包装层，
+    冷启动更快、内存占用更小（转换脚本见 convert_model.py）。
+    UBJ 文件按需从操作系统页缓存读入，不像 pickle 一次性
+    把整个对象图物化到 Python 堆上。
+
+    推理强制单线程：单行预测时多线程的 OpenMP 分发开销远大于树遍历本身。
+    设置环境变量 WIND_GPU=1 可切换到 CUDA 设备，但 GPU 只在批量打分
+    （如未来的"what-if"网格模式）时才划算，单行预测请保持 CPU。
+    """
+    if not os.path.exists(path):
+        st.error(f"错误: 模型文件 {path} 未找到。请先运行 convert_model.py 生成模型文件。") # 在网页上显示错误信息
         print(f"错误: 文件 {path} 未找到") # 控制台输出错误信息
         return None
+    if os.path.getsize(path) > 100 * 1024 * 1024: # 模型异常膨胀时提醒排查
+        print(f"提示: 模型文件 {path} 超过 100MB，加载与常驻内存开销较大")
+    try:
+        booster = xgb.Booster()
+        booster.load_model(path)
+        # 单行推理用单线程避免 OpenMP 栅栏开销；WIND_GPU=1 时切到 CUDA
+        booster.set_param({'nthread': 1, 'device': 'cuda' if USE_GPU else 'cpu'})
+        print(f"模型 {path} 加载成功") # 控制台输出加载成功信息
+        return booster
     except Exception as e:
         st.error(f"加载模型时出错: {str(e)}") # 在网页上显示通用错误信息
         print(f"加载模型时出错: {str(e)}") # 控制台输出错误信息
         return None
 
+@st.cache_resource # Treelite 推理器同样全局共享
+def load_treelite_predictor(libpath):
+    """加载 Treelite 编译出的本地推理库 (可选加速)
+
+    编译后的直线式 C 代码比通用树遍历快约一个数量级；
+    库文件或运行时不存在时返回 None，推理回退到 Booster。
+    """
+    if treelite_runtime is None or not os.path.exists(libpath):
+        return None
+    predictor = treelite_runtime.Predictor(libpath, nthread=1)
+    print(f"Treelite 编译库 {libpath} 加载成功")
+    return predictor
+
+
+@st.cache_resource # ONNX 会话同样全局共享
+def load_onnx_session(path):
+    """加载 ONNX 格式的模型并创建推理会话 (可选加速)
+
+    图优化开到最高档做常量折叠与节点融合；单行推理用单线程算子。
+    模型文件或 onnxruntime 不存在时返回 None，推理回退到 Booster。
+    """
+    if ort is None or not os.path.exists(path):
+        return None
+    so = ort.SessionOptions()
+    so.intra_op_num_threads = 1
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = ort.InferenceSession(path, sess_options=so,
+                                   providers=['CPUExecutionProvider'])
+    print(f"ONNX 模型 {path} 加载成功")
+    return session
+
+
 model = load_model(MODEL_PATH) # 加载模型
+tl_predictor = load_treelite_predictor(TREELITE_LIB) # 可选的 Treelite 加速路径
+ort_session = load_onnx_session(ONNX_PATH) # 可选的 ONNX Runtime 加速路径
+
+
+@st.cache_data(max_entries=512, ttl="1h") # 限制条目数并设置过期时间，避免缓存无限增长
+def _predict(features_tuple):
+    """对单行特征做预测，以特征元组为缓存键
+
+    相同输入的重复点击直接命中缓存，省去一次完整的 XGBoost 树遍历。
+    模型通过闭包引用，不参与缓存键计算。
+
+    输入统一为 float32：模型本身以单精度训练，全程 float32
+    可避免 float64 装箱和推理前的二次转换，且无精度损失。
+    """
+    import numpy as np # 延迟导入：首个预测请求前不占用冷启动时间
+    row = np.fromiter(features_tuple, dtype=np.float32,
+                      count=len(REQUIRED_FEATURES)).reshape(1, -1)
+    # 形状错误属于配置问题，在进入推理后端前就大声失败
+    assert row.shape == (1, len(REQUIRED_FEATURES))
+    try:
+        if tl_predictor is not None: # 优先走编译后的 C 推理路径
+            # 单行输入时 Predictor.predict 返回 0 维数组，直接转 float，不能下标
+            return float(tl_predictor.predict(treelite_runtime.DMatrix(row)))
+        if ort_session is not None: # 其次走 ONNX Runtime 的融合算子
+            return float(ort_session.run(None, {'input': row})[0][0, 0])
+    except Exception as e:
+        # Treelite/ONNX 的异常类型各不相同且无公共基类，
+        # 在此归一化为 ValueError，调用方收窄后的异常处理对所有后端都成立
+        raise ValueError(f"推理后端出错: {e}") from e
+    return float(model.inplace_predict(row)[0])
+
+
+def _predict_batch(matrix):
+    """对批量特征矩阵 (N 行 float32, C 连续) 做预测
+
+    单次调用对整批打分，把 Python 侧的分发开销摊薄到 N 行上。
+    后端选择顺序与 _predict 一致。
+    """
+    try:
+        if tl_predictor is not None:
+            return tl_predictor.predict(treelite_runtime.DMatrix(matrix))
+        if ort_session is not None:
+            return ort_session.run(None, {'input': matrix})[0].ravel()
+    except Exception as e:
+        # 与 _predict 相同：后端异常归一化为 ValueError
+        raise ValueError(f"推理后端出错: {e}") from e
+    return model.inplace_predict(matrix)
+
+@st.fragment # 作为 fragment 重跑时只重渲染本子树，标题和侧边栏保持不动
+def _show_prediction():
+    """展示最近一次预测结果 (从 st.session_state 读取)"""
+    predicted_value = st.session_state['last_pred']
+    st.subheader("📈 预测结果") # 结果区域标题
+    st.metric(label="预测发电量 (kWh)", value=f"{predicted_value:.4f}") # 使用metric显示结果，保留4位小数
+    st.success("预测完成！") # 显示成功信息
+
+    # 添加一些解释性文本
+    st.markdown(f"""
+    ---
+    **说明:**
+    *   ⚡️ 该预测结果基于输入的特征和训练好的 **{MODEL_DISPLAY_NAME}** 模型。
+    *   🕒 预测的是接下来 **15 分钟** 时间段内的总发电量。
+    """)
+
 
 # --- Streamlit 界面 ---
 st.title("🌬️ 风力发电量预测器") # 应用主标题
-st.markdown(f"使用训练好的 **{MODEL_FILENAME.split('_best_model.pkl')[0]}** 模型，根据输入的特征预测未来15分钟的风力发电量 (kWh)") # 应用描述
+st.markdown(f"使用训练好的 **{MODEL_DISPLAY_NAME}** 模型，根据输入的特征预测未来15分钟的风力发电量 (kWh)") # 应用描述
 
 # --- 输入区域 ---
 st.sidebar.header("⚙️ 请输入预测所需特征") # 侧边栏标题
@@ -52,70 +207,76 @@ st.sidebar.header("⚙️ 请输入预测所需特征") # 侧边栏标题
 input_features = {}
 
 # 为每个需要的特征创建输入控件
-st.sidebar.subheader("时间特征")
-input_features['年'] = st.sidebar.number_input("年:", min_value=2019, max_value=2030, value=2023, step=1)
-input_features['月'] = st.sidebar.slider("月:", min_value=1, max_value=12, value=6, step=1)
-input_features['日'] = st.sidebar.slider("日:", min_value=1, max_value=31, value=15, step=1)
-input_features['时'] = st.sidebar.slider("时 (24小时制):", min_value=0, max_value=23, value=12, step=1)
-input_features['分'] = st.sidebar.selectbox("分:", options=[0, 15, 30, 45], index=0) # 数据是15分钟间隔
-
-st.sidebar.subheader("气象特征")
-if '测风塔70米风速(m/s)' in REQUIRED_FEATURES:
-    input_features['测风塔70米风速(m/s)'] = st.sidebar.number_input("测风塔70米风速(m/s):", min_value=0.0, value=5.0, step=0.1, format="%.1f")
-if '测风塔50米风速(m/s)' in REQUIRED_FEATURES:
-    input_features['测风塔50米风速(m/s)'] = st.sidebar.number_input("测风塔50米风速(m/s):", min_value=0.0, value=4.5, step=0.1, format="%.1f")
-if '测风塔30米风速(m/s)' in REQUIRED_FEATURES:
-    input_features['测风塔30米风速(m/s)'] = st.sidebar.number_input("测风塔30米风速(m/s):", min_value=0.0, value=4.0, step=0.1, format="%.1f")
-if '测风塔10米风速(m/s)' in REQUIRED_FEATURES:
-    input_features['测风塔10米风速(m/s)'] = st.sidebar.number_input("测风塔10米风速(m/s):", min_value=0.0, value=3.5, step=0.1, format="%.1f")
-if '温度(°C)' in REQUIRED_FEATURES:
-    input_features['温度(°C)'] = st.sidebar.number_input("温度(°C):", min_value=-20.0, max_value=50.0, value=15.0, step=0.1, format="%.1f")
-if '气压(hPa)' in REQUIRED_FEATURES: 
-     input_features['气压(hPa)'] = st.sidebar.number_input("气压(hPa):", min_value=800.0, max_value=1100.0, value=875.0, step=0.1, format="%.1f")
-if '湿度(%)' in REQUIRED_FEATURES: 
-     input_features['湿度(%)'] = st.sidebar.slider("湿度(%):", min_value=0.0, max_value=100.0, value=60.0, step=0.1, format="%.1f")
-
-
-# --- 预测按钮和结果显示 ---
-if st.sidebar.button("🚀 预测发电量", type="primary"): # 预测按钮
-    if model is not None: 
+# 用 st.form 把所有输入打包：拖动滑块不再触发整个脚本重跑，
+# 只有点击提交按钮时才执行一次预测
+with st.sidebar.form('inputs'):
+    st.subheader("时间特征")
+    input_features['年'] = st.number_input("年:", min_value=2019, max_value=2030, step=1, key='year')
+    input_features['月'] = st.slider("月:", min_value=1, max_value=12, step=1, key='month')
+    input_features['日'] = st.slider("日:", min_value=1, max_value=31, step=1, key='day')
+    input_features['时'] = st.slider("时 (24小时制):", min_value=0, max_value=23, step=1, key='hour')
+    input_features['分'] = st.selectbox("分:", options=[0, 15, 30, 45], key='minute') # 数据是15分钟间隔
+
+    st.subheader("气象特征")
+    for name, widget_fn, widget_kwargs in WIDGET_SPEC:
+        if name in REQUIRED_FEATURES_SET:
+            input_features[name] = widget_fn(name + ':', **widget_kwargs)
+
+    sweep_mode = st.checkbox("扫描风速", help="对70米风速 0~15 m/s 批量预测并绘制曲线", key='sweep')
+    submitted = st.form_submit_button("🚀 预测发电量", type="primary") # 预测按钮
+
+
+# --- 预测结果显示 ---
+if submitted:
+    import numpy as np # 延迟导入：仅预测时需要，不拖慢首屏加载
+    if model is not None:
         # 1. 准备输入数据
-        missing_inputs = [feature for feature in REQUIRED_FEATURES if feature not in input_features]
+        missing_inputs = REQUIRED_FEATURES_SET.difference(input_features)
         if missing_inputs:
             st.error(f"错误：缺少以下特征的输入控件：{', '.join(missing_inputs)}")
         else:
-            # 2. 转换为DataFrame，并特征顺序正确
+            # 2. 按训练时的特征顺序取值，直接构造 NumPy 行 (省去 pandas DataFrame 构建开销)
             try:
-                input_df = pd.DataFrame([input_features])
-                input_df = input_df[REQUIRED_FEATURES] # 按照训练时的顺序排列特征
-
-                # 3. 进行预测
-                prediction = model.predict(input_df)
-                predicted_value = prediction[0] # 获取预测结果 (假设模型输出单个值)
+                # 3. 进行预测 (相同输入的重复点击命中 _predict 的缓存)
+                predicted_value = _predict(tuple(input_features[f] for f in REQUIRED_FEATURES))
 
                 # 对预测结果进行合理性处理（发电量不能为负）
-                predicted_value = max(0, predicted_value)
+                # np.maximum 对标量和数组同样适用，批量化后无需改动
+                predicted_value = float(np.maximum(0.0, predicted_value).item())
 
-                # 4. 显示预测结果
-                st.subheader("📈 预测结果") # 结果区域标题
-                st.metric(label="预测发电量 (kWh)", value=f"{predicted_value:.4f}") # 使用metric显示结果，保留4位小数
-                st.success("预测完成！") # 显示成功信息
+                # 4. 显示预测结果 (fragment 只重跑结果子树)
+                st.session_state['last_pred'] = predicted_value
+                _show_prediction()
 
-                # 添加一些解释性文本
-                st.markdown(f"""
-                ---
-                **说明:**
-                *   ⚡️ 该预测结果基于输入的特征和训练好的 **{MODEL_FILENAME.split('_best_model.pkl')[0]}** 模型。
-                *   🕒 预测的是接下来 **15 分钟** 时间段内的总发电量。
-                """)
+                # 5. 批量"what-if"扫描：构造一整块 C 连续的 float32 矩阵，
+                # 单次调用对整段风速区间打分，而不是逐行建 DataFrame
+                if sweep_mode:
+                    import pandas as pd # 延迟导入：只有扫描模式的图表需要 pandas
+                    speeds = np.arange(0.0, 15.0, 0.1, dtype=np.float32)
+                    base_row = np.fromiter((input_features[f] for f in REQUIRED_FEATURES),
+                                           dtype=np.float32, count=len(REQUIRED_FEATURES))
+                    grid = np.tile(base_row, (speeds.size, 1))
+                    grid[:, FEATURE_INDEX['测风塔70米风速(m/s)']] = speeds
+                    preds = _predict_batch(grid)
+                    # 发电量不能为负，就地裁剪无额外临时数组；
+                    # 只有大批量时 NumExpr 的多线程才抵得过线程池启动开销
+                    if ne is not None and preds.size > 1024:
+                        ne.evaluate('where(preds < 0, 0, preds)', out=preds)
+                    else:
+                        np.maximum(preds, 0, out=preds)
+                    st.subheader("🔍 风速扫描 (70米风速 0~15 m/s)")
+                    st.line_chart(pd.DataFrame({'预测发电量 (kWh)': preds},
+                                               index=pd.Index(speeds, name='70米风速(m/s)')))
 
             except KeyError as e:
                 st.error(f"输入数据准备错误: 缺少特征 {str(e)} 或顺序不匹配。请检查 `REQUIRED_FEATURES` 列表。") # 处理特征名称不匹配错误
                 print(f"KeyError during prediction: {e}")
-                print(f"Input DataFrame columns: {input_df.columns.tolist()}")
+                print(f"Input features: {list(input_features)}")
                 print(f"Required features: {REQUIRED_FEATURES}")
-            except Exception as e:
-                st.error(f"预测过程中发生错误: {str(e)}") 
+            # 控件已保证输入是范围内的数值，只有取值和推理本身可能出错；
+            # 不兜底 Exception，避免吞掉真正的回归问题
+            except (ValueError, xgb.core.XGBoostError) as e:
+                st.error(f"预测过程中发生错误: {str(e)}")
                 print(f"Prediction error: {e}")
 
     else:
@@ -123,4 +284,4 @@ if st.sidebar.button("🚀 预测发电量", type="primary"): # 预测按钮
 
 # --- 页脚信息  ---
 st.sidebar.markdown("---")
-st.sidebar.info(f"💬 模型: {MODEL_FILENAME.split('_best_model.pkl')[0]} | 数据: 风电场气象与发电数据")
\ No newline at end of file
+st.sidebar.info(f"💬 模型: {MODEL_DISPLAY_NAME} | 数据: 风电场气象与发电数据")
\ No newline at end of file
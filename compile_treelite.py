@@ -0,0 +1,23 @@
+"""一次性编译脚本：用 Treelite 把 XGBoost 树模型编译成本地 C 扩展库。
+
+运行一次即可（需要 gcc）：
+    python compile_treelite.py
+
+通用的树遍历器靠间接跳转逐节点走树；Treelite 把整个集成模型编译成
+直线式 C 代码，单行推理约快一个数量级。生成的 wind_model.so 存在时
+app.py 会自动优先使用，否则回退到 Booster 推理。
+"""
+import treelite
+import xgboost as xgb
+
+UBJ_PATH = 'XGBoost_best_model.ubj'
+LIB_PATH = 'wind_model.so'
+
+if __name__ == '__main__':
+    booster = xgb.Booster()
+    booster.load_model(UBJ_PATH)
+    tl_model = treelite.Model.from_xgboost(booster)
+    # quantize=1 把浮点阈值量化为整数比较；模型以 float32 训练，无精度损失
+    tl_model.export_lib(toolchain='gcc', libpath=LIB_PATH,
+                        params={'parallel_comp': 8, 'quantize': 1})
+    print(f"已将 {UBJ_PATH} 编译为 {LIB_PATH}")
@@ -0,0 +1,19 @@
+"""一次性转换脚本：把 pickle 格式的 sklearn 包装模型转成 XGBoost 原生 UBJ 格式。
+
+运行一次即可：
+    python convert_model.py
+
+生成的 XGBoost_best_model.ubj 由 app.py 直接通过 xgboost.Booster 加载，
+跳过 pickle 反序列化和 sklearn 包装层，冷启动更快、内存占用更小。
+"""
+import pickle
+
+PKL_PATH = 'XGBoost_best_model.pkl'
+UBJ_PATH = 'XGBoost_best_model.ubj'
+
+if __name__ == '__main__':
+    with open(PKL_PATH, 'rb') as f:
+        model = pickle.load(f)
+    booster = model.get_booster()  # 取出底层 Booster，丢弃 sklearn 包装
+    booster.save_model(UBJ_PATH)
+    print(f"已将 {PKL_PATH} 转换为 {UBJ_PATH}")
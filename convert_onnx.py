@@ -0,0 +1,28 @@
+"""一次性转换脚本：把 XGBoost 树模型导出为 ONNX 格式。
+
+运行一次即可：
+    python convert_onnx.py
+
+ONNX Runtime 对树集成做常量折叠与节点融合，用向量化的
+TreeEnsembleRegressor 算子推理，是 Treelite 之外的另一条加速路径。
+生成的 wind.onnx 存在时 app.py 会自动使用（优先级低于 wind_model.so）。
+"""
+import onnx
+import xgboost as xgb
+from onnxmltools.convert import convert_xgboost
+from onnxmltools.convert.common.data_types import FloatTensorType
+
+UBJ_PATH = 'XGBoost_best_model.ubj'
+ONNX_PATH = 'wind.onnx'
+
+if __name__ == '__main__':
+    booster = xgb.Booster()
+    booster.load_model(UBJ_PATH)
+    # convert_xgboost 只接受 'f%d' 形式的特征名，中文特征名会被拒绝；
+    # 清掉后按列号导出，推理端本就按 REQUIRED_FEATURES 顺序传列，不受影响
+    booster.feature_names = None
+    # 模型以 float32 训练，输入类型用 FloatTensorType 不损精度
+    initial_types = [('input', FloatTensorType([None, booster.num_features()]))]
+    onnx_model = convert_xgboost(booster, initial_types=initial_types)
+    onnx.save(onnx_model, ONNX_PATH)
+    print(f"已将 {UBJ_PATH} 导出为 {ONNX_PATH}")